@@ -466,12 +466,24 @@ function fetchJson(url, options) {
   });
 }
 
+function fetchResultPdf(jobId, result) {
+  return fetch(
+    `http://127.0.0.1:${engineServerPort}/result-pdf?jobId=${encodeURIComponent(jobId)}`
+  ).then(async (res) => {
+    if (!res.ok) {
+      return { ok: false, error: `获取结果文件失败 (${res.status})` };
+    }
+    // Uint8Array survives IPC structured cloning, so the bytes are passed as-is.
+    return { ...result, pdf_bytes: new Uint8Array(await res.arrayBuffer()) };
+  });
+}
+
 function fetchResultWithRetry(jobId, retries = 10, delayMs = 500) {
   return fetchJson(
     `http://127.0.0.1:${engineServerPort}/result?jobId=${encodeURIComponent(jobId)}`
   ).then((result) => {
     console.log(`[engine] result payload for ${jobId}`, result);
-    if (result && result.ok) return result;
+    if (result && result.ok) return fetchResultPdf(jobId, result);
     if (result && result.error === 'job not finished' && retries > 0) {
       return new Promise((resolve) =>
         setTimeout(() => resolve(fetchResultWithRetry(jobId, retries - 1, delayMs)), delayMs)
@@ -492,8 +504,10 @@ function openProgressStream(jobId) {
 
   let buffer = '';
   req.on('response', (res) => {
+    // Events are UTF-8 JSON; let the decoder handle characters split across chunks.
+    res.setEncoding('utf8');
     res.on('data', (chunk) => {
-      buffer += chunk.toString();
+      buffer += chunk;
       let index;
       while ((index = buffer.indexOf('\n')) >= 0) {
         const line = buffer.slice(0, index).trim();
@@ -587,5 +601,8 @@ ipcMain.handle('download-result', async (_event, jobId) => {
     return null;
   }
   const result = await fetchJson(`http://127.0.0.1:${engineServerPort}/result?jobId=${encodeURIComponent(jobId)}`);
+  if (result && result.ok) {
+    return fetchResultPdf(jobId, result);
+  }
   return result;
 });
@@ -132,21 +132,21 @@ def build_settings(job: EngineJob) -> SettingsModel:
 
     settings = SettingsModel(translate_engine_settings=engine_settings)
 
-    settings.report_interval = float(job.reportInterval)
+    settings.report_interval = job.reportInterval
     settings.translation.output = job.outputDir
-    settings.translation.ignore_cache = bool(job.ignoreCache)
-    settings.translation.pool_max_workers = int(job.threads)
-    settings.translation.term_pool_max_workers = int(job.threads)
+    settings.translation.ignore_cache = job.ignoreCache
+    settings.translation.pool_max_workers = job.threads
+    settings.translation.term_pool_max_workers = job.threads
     settings.pdf.pages = job.pages
-    settings.pdf.no_dual = not bool(job.dual)
-    settings.pdf.no_mono = not bool(job.mono)
+    settings.pdf.no_dual = not job.dual
+    settings.pdf.no_mono = not job.mono
 
     if job.langIn:
         settings.translation.lang_in = job.langIn
     if job.langOut:
         settings.translation.lang_out = job.langOut
     if job.qps is not None:
-        settings.translation.qps = int(job.qps)
+        settings.translation.qps = job.qps
 
     return settings
 
@@ -1,25 +1,34 @@
 from __future__ import annotations
 
 import argparse
-import base64
+import asyncio
+import collections
+import concurrent.futures
+import functools
 import json
 import logging
 import multiprocessing
 import os
+import queue
+import secrets
 import shutil
 import signal
+import socket
 import sys
 import tempfile
 import threading
 import traceback
-import uuid
+import urllib.parse
 from logging import FileHandler
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-from pdf2zh_engine.job import EngineJob
+import msgspec
+import orjson
+
+from pdf2zh_engine.job import EngineJob, normalize_paths
 
 
 LOGGER = logging.getLogger("pdf2zh_engine.server")
@@ -134,22 +143,42 @@ def restore_offline_assets(offline_assets_zip: str | None) -> None:
         )
 
 
+# (event type, encoded SSE frame)
+EventItem = tuple[str, bytes]
+
+
 class JobState:
     def __init__(self) -> None:
-        self.events: list[dict[str, Any]] = []
+        # Each event is stored as a ready-to-send SSE frame, encoded once.
+        # The history is replayed to subscribers that connect late.
+        self.events: collections.deque[EventItem] = (
+            collections.deque()
+        )
+        # One queue per connected /events stream; None marks the end.
+        self.subscribers: list[queue.SimpleQueue[EventItem | None]] = []
         self.done = False
+        self.done_emitted = False
+        # Last progress sent, used to drop no-op updates.
+        self.last_pct = -1
+        self.last_stage: str | None = None
         self.result: dict[str, Any] | None = None
         self.error: dict[str, Any] | None = None
-        self.cv = threading.Condition()
+        # Kept until /result-pdf has served the file.
+        self.result_path: Path | None = None
+        self.temp_dir: str | None = None
+        self.lock = threading.Lock()
 
 
 class EngineService:
     def __init__(self) -> None:
         self.jobs: dict[str, JobState] = {}
+        # Output dirs of finished jobs whose PDF has not been served yet.
+        self.temp_dirs: set[str] = set()
+        self.closed = False
         self.lock = threading.Lock()
 
     def create_job(self) -> tuple[str, JobState]:
-        job_id = str(uuid.uuid4())
+        job_id = secrets.token_hex(16)
         state = JobState()
         with self.lock:
             self.jobs[job_id] = state
@@ -159,26 +188,94 @@ class EngineService:
         with self.lock:
             return self.jobs.get(job_id)
 
+    def retain_temp_dir(self, path: str) -> None:
+        with self.lock:
+            if not self.closed:
+                self.temp_dirs.add(path)
+                return
+        # Shutting down: nothing will serve the result any more.
+        shutil.rmtree(path, ignore_errors=True)
+
+    def release_temp_dir(self, path: str) -> None:
+        with self.lock:
+            self.temp_dirs.discard(path)
+        shutil.rmtree(path, ignore_errors=True)
+
+    def release_temp_dirs(self) -> None:
+        with self.lock:
+            self.closed = True
+            paths = list(self.temp_dirs)
+            self.temp_dirs.clear()
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+
 
 SERVICE = EngineService()
 
 
 def _emit(state: JobState, payload: dict[str, Any]) -> None:
-    with state.cv:
-        state.events.append(payload)
-        state.cv.notify_all()
+    item = (payload["type"], b"data: " + orjson.dumps(payload) + b"\n\n")
+    with state.lock:
+        state.events.append(item)
+        for q in state.subscribers:
+            q.put(item)
+
+
+def _emit_done(state: JobState) -> None:
+    with state.lock:
+        if state.done_emitted:
+            return
+        state.done_emitted = True
+    _emit(state, {"type": "done", "pct": 100})
+
+
+def _finish(state: JobState) -> None:
+    with state.lock:
+        state.done = True
+        for q in state.subscribers:
+            q.put(None)
+        state.subscribers.clear()
+
+
+def _subscribe(state: JobState) -> queue.SimpleQueue[EventItem | None]:
+    q: queue.SimpleQueue[EventItem | None] = queue.SimpleQueue()
+    with state.lock:
+        for item in state.events:
+            q.put(item)
+        if state.done:
+            q.put(None)
+        else:
+            state.subscribers.append(q)
+    return q
+
+
+def _unsubscribe(state: JobState, q: queue.SimpleQueue[EventItem | None]) -> None:
+    with state.lock:
+        if q in state.subscribers:
+            state.subscribers.remove(q)
+
+
+_PROGRESS_KEYS = ("overall_progress", "stage_progress", "progress")
 
 
 def _event_to_progress(event: dict[str, Any]) -> dict[str, Any] | None:
     pct: float | None = None
-    for key in ("overall_progress", "stage_progress", "progress"):
-        if key in event:
+    for key in _PROGRESS_KEYS:
+        if key not in event:
+            continue
+        raw = event[key]
+        value: float
+        if isinstance(raw, (int, float)):
+            value = raw
+        elif isinstance(raw, str):
             try:
-                value = float(event[key])
-            except Exception:
+                value = float(raw)
+            except ValueError:
                 continue
-            pct = value * 100 if value <= 1 else value
-            break
+        else:
+            continue
+        pct = value * 100 if value <= 1 else value
+        break
 
     if pct is None and event.get("type") in ("start", "engine_start"):
         pct = 0
@@ -196,135 +293,245 @@ def _event_to_progress(event: dict[str, Any]) -> dict[str, Any] | None:
     }
 
 
-def _resolve_source(payload: dict[str, Any]) -> tuple[str, str | None]:
-    source_path = payload.get("source_path") or payload.get("sourcePath")
-    if not source_path and isinstance(payload.get("inputs"), list):
-        inputs = payload.get("inputs")
-        if inputs:
-            source_path = inputs[0]
+def _is_new_progress(state: JobState, progress: dict[str, Any]) -> bool:
+    # pdf2zh_next already throttles progress to report_interval, so only drop
+    # exact repeats; every changed percentage or stage still goes out.
+    if progress["stage"] == state.last_stage and progress["pct"] == state.last_pct:
+        return False
+    state.last_pct = progress["pct"]
+    state.last_stage = progress["stage"]
+    return True
+
+
+class TranslateRequest(msgspec.Struct):
+    source_path: str | None = None
+    sourcePath: str | None = None
+    inputs: list[str] | None = None
+    source_filename: str | None = None
+    sourceFilename: str | None = None
+    service: str | None = None
+    lang_in: str | None = None
+    lang_out: str | None = None
+    # Sent by the Electron client; jobs currently always use 4 threads.
+    threads: int | None = None
+
+
+TRANSLATE_REQUEST_DECODER = msgspec.json.Decoder(TranslateRequest)
+
+
+def _resolve_source(payload: TranslateRequest) -> tuple[str, str | None]:
+    source_path = payload.source_path or payload.sourcePath
+    if not source_path and payload.inputs:
+        source_path = payload.inputs[0]
+    source_path = (source_path or "").strip()
     if not source_path:
         raise ValueError("Missing source_path")
-    source_filename = payload.get("source_filename") or payload.get("sourceFilename")
-    return str(source_path), (str(source_filename) if source_filename else None)
+    source_filename = payload.source_filename or payload.sourceFilename
+    return source_path, source_filename or None
 
 
-def _build_job(payload: dict[str, Any], output_dir: str) -> tuple[EngineJob, str]:
+def _build_job(payload: TranslateRequest, output_dir: str) -> tuple[EngineJob, str]:
     source_path, source_filename = _resolve_source(payload)
-    service = payload.get("service", "google")
+    service = payload.service or "google"
     threads = 4
-    lang_in = payload.get("lang_in", "en")
-    lang_out = payload.get("lang_out", "zh")
-
-    job = EngineJob.model_validate(
-        {
-            "inputs": [source_path],
-            "outputDir": output_dir,
-            "service": service,
-            "langIn": lang_in,
-            "langOut": lang_out,
-            "dual": True,
-            "mono": False,
-            "qps": 4,
-            "reportInterval": 1,
-            "threads": int(threads),
-        }
+
+    # Every field below is produced here with a known type, so build the
+    # struct directly and only run the filesystem checks.
+    job = EngineJob(
+        inputs=[source_path],
+        outputDir=output_dir,
+        service=service.strip().lower(),
+        langIn=(payload.lang_in or "en").strip() or None,
+        langOut=(payload.lang_out or "zh").strip() or None,
+        dual=True,
+        mono=False,
+        qps=4,
+        reportInterval=1.0,
+        ignoreCache=False,
+        threads=threads,
     )
+    normalize_paths(job)
 
     if not source_filename:
         source_filename = Path(source_path).name
     return job, source_filename
 
 
+def _finish_output_pdf(event: dict[str, Any]) -> Path | None:
+    # pdf2zh_next reports the written files on its finish event; use that
+    # when present instead of scanning the output directory.
+    result = event.get("translate_result")
+    if not isinstance(result, dict):
+        return None
+    path = result.get("dual_pdf_path") or result.get("mono_pdf_path")
+    if not isinstance(path, str) or not os.path.isfile(path):
+        return None
+    return Path(path)
+
+
 def _find_output_pdf(output_dir: str) -> Path:
-    candidates = list(Path(output_dir).rglob("*.pdf"))
-    if not candidates:
+    best: tuple[bool, float, str] | None = None
+    stack = [output_dir]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                name = entry.name.lower()
+                if not name.endswith(".pdf"):
+                    continue
+                key = ("dual" in name, entry.stat().st_mtime, entry.path)
+                if best is None or key > best:
+                    best = key
+    if best is None:
         raise FileNotFoundError("No PDF output found in temporary directory")
-    dual_candidates = [p for p in candidates if "dual" in p.name.lower()]
-    ordered = dual_candidates or candidates
-    return max(ordered, key=lambda p: p.stat().st_mtime)
+    return Path(best[2])
+
+
+@functools.cache
+def _load_runner() -> Callable[..., Any]:
+    # pdf2zh_next is slow to import, so keep it off the startup path; main()
+    # warms this in the background once the server is listening.
+    from pdf2zh_engine.runner import run_job_stream
+
+    return run_job_stream
+
+
+_LOOP: asyncio.AbstractEventLoop | None = None
+_LOOP_LOCK = threading.Lock()
 
 
-def _run_job(state: JobState, payload: dict[str, Any]) -> None:
+def _job_loop() -> asyncio.AbstractEventLoop:
+    # One long-lived loop shared by all jobs instead of asyncio.run() per job.
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="pdf2zh-loop", daemon=True
+            ).start()
+            _LOOP = loop
+        return _LOOP
+
+
+WORKERS = concurrent.futures.ThreadPoolExecutor(
+    max_workers=os.cpu_count() or 4, thread_name_prefix="pdf2zh-job"
+)
+
+
+def _cancel_all_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    for task in asyncio.all_tasks(loop):
+        task.cancel()
+
+
+def _stop_jobs() -> None:
+    # Pool threads are joined at interpreter exit, so cancel running jobs
+    # rather than letting a translation hold the process open.
+    WORKERS.shutdown(wait=False, cancel_futures=True)
+    with _LOOP_LOCK:
+        loop = _LOOP
+    if loop is not None:
+        loop.call_soon_threadsafe(_cancel_all_tasks, loop)
+
+
+def _preload_runner() -> None:
+    try:
+        _load_runner()
+    except Exception as exc:
+        LOGGER.warning("preloading translation runner failed: %s", exc)
+
+
+def _run_job(state: JobState, payload: TranslateRequest) -> None:
     temp_dir: str | None = None
     try:
         temp_dir = tempfile.mkdtemp(prefix="pdf2zh-engine-")
         job, source_filename = _build_job(payload, temp_dir)
+        finished_pdf: Path | None = None
 
         def emit(event: dict[str, Any]) -> None:
+            nonlocal finished_pdf
             progress = _event_to_progress(event)
-            if progress:
+            if progress and _is_new_progress(state, progress):
                 _emit(state, progress)
             if event.get("type") == "finish":
-                _emit(state, {"type": "done", "pct": 100})
+                finished_pdf = _finish_output_pdf(event)
 
         stdout = sys.stdout
         sys.stdout = sys.stderr
         try:
-            import asyncio
-            from pdf2zh_engine.runner import run_job_stream
-
-            asyncio.run(run_job_stream(job, emit))
+            future = asyncio.run_coroutine_threadsafe(
+                _load_runner()(job, emit), _job_loop()
+            )
+            future.result()
         finally:
             sys.stdout = stdout
 
-        output_pdf = _find_output_pdf(temp_dir)
-        pdf_bytes = output_pdf.read_bytes()
-        pdf_base64 = base64.b64encode(pdf_bytes).decode("ascii")
+        output_pdf = finished_pdf or _find_output_pdf(temp_dir)
         stem = Path(source_filename).stem if source_filename else "output"
+        with state.lock:
+            state.result_path = output_pdf
+            state.temp_dir = temp_dir
+        SERVICE.retain_temp_dir(temp_dir)
         state.result = {
             "ok": True,
             "filename": f"{stem} (双语).pdf",
-            "pdf_base64": pdf_base64,
         }
-        _emit(state, {"type": "done", "pct": 100})
-        state.done = True
+        _emit_done(state)
     except Exception as exc:
         detail = traceback.format_exc()
         LOGGER.error("job failed: %s", exc)
         LOGGER.error(detail)
         state.error = {"ok": False, "error": str(exc), "detail": detail}
         _emit(state, {"type": "error", "message": str(exc), "detail": detail})
-        state.done = True
     finally:
-        if temp_dir:
+        if temp_dir and state.temp_dir != temp_dir:
             shutil.rmtree(temp_dir, ignore_errors=True)
-        with state.cv:
-            state.cv.notify_all()
+        _finish(state)
+
+
+def _release_result(state: JobState) -> None:
+    with state.lock:
+        temp_dir = state.temp_dir
+        state.temp_dir = None
+        state.result_path = None
+    if temp_dir:
+        SERVICE.release_temp_dir(temp_dir)
 
 
 class Handler(BaseHTTPRequestHandler):
     def _json_response(self, status: int, payload: dict[str, Any]) -> None:
-        body = json.dumps(payload, ensure_ascii=True).encode("utf-8")
+        body = orjson.dumps(payload)
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
         self.send_header("Content-Length", str(len(body)))
         self.end_headers()
         self.wfile.write(body)
 
-    def _read_json(self) -> dict[str, Any]:
+    def _read_request(self) -> TranslateRequest:
         length = int(self.headers.get("Content-Length", "0"))
-        raw = self.rfile.read(length).decode("utf-8") if length else ""
+        raw = self.rfile.read(length) if length else b""
         if not raw:
-            return {}
-        return json.loads(raw)
+            return TranslateRequest()
+        return TRANSLATE_REQUEST_DECODER.decode(raw)
 
     def do_POST(self) -> None:
         if self.path != "/translate":
             self.send_error(HTTPStatus.NOT_FOUND)
             return
         try:
-            payload = self._read_json()
+            payload = self._read_request()
         except Exception as exc:
             self._json_response(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
             return
 
-        if "source_path" not in payload and "sourcePath" not in payload:
+        if payload.source_path is None and payload.sourcePath is None:
             self._json_response(
                 HTTPStatus.BAD_REQUEST, {"error": "source_path required"}
             )
             return
 
-        service = payload.get("service")
+        service = payload.service
         if service not in {"google", "bing"}:
             self._json_response(
                 HTTPStatus.BAD_REQUEST,
@@ -333,20 +540,23 @@ class Handler(BaseHTTPRequestHandler):
             return
 
         job_id, state = SERVICE.create_job()
-        thread = threading.Thread(target=_run_job, args=(state, payload), daemon=True)
-        thread.start()
+        WORKERS.submit(_run_job, state, payload)
         self._json_response(HTTPStatus.OK, {"jobId": job_id})
 
     def do_GET(self) -> None:
-        if self.path == "/health":
+        split = urllib.parse.urlsplit(self.path)
+        path = split.path
+        query = urllib.parse.parse_qs(split.query)
+
+        if path == "/health":
             self._json_response(
                 HTTPStatus.OK,
                 {"status": "ok", "pid": os.getpid()},
             )
             return
 
-        if self.path.startswith("/events"):
-            job_id = self._query_param("jobId")
+        if path == "/events":
+            job_id = query.get("jobId", [None])[0]
             if not job_id:
                 self.send_error(HTTPStatus.BAD_REQUEST)
                 return
@@ -357,12 +567,13 @@ class Handler(BaseHTTPRequestHandler):
             self.send_response(HTTPStatus.OK)
             self.send_header("Content-Type", "text/event-stream")
             self.send_header("Cache-Control", "no-cache")
+            self.send_header("X-Accel-Buffering", "no")
             self.end_headers()
             self._stream_events(state)
             return
 
-        if self.path.startswith("/result"):
-            job_id = self._query_param("jobId")
+        if path == "/result":
+            job_id = query.get("jobId", [None])[0]
             if not job_id:
                 self.send_error(HTTPStatus.BAD_REQUEST)
                 return
@@ -383,40 +594,81 @@ class Handler(BaseHTTPRequestHandler):
             )
             return
 
+        if path == "/result-pdf":
+            job_id = query.get("jobId", [None])[0]
+            if not job_id:
+                self.send_error(HTTPStatus.BAD_REQUEST)
+                return
+            state = SERVICE.get_job(job_id)
+            if not state:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+            self._send_result_pdf(state)
+            return
+
         self.send_error(HTTPStatus.NOT_FOUND)
 
-    def _query_param(self, key: str) -> str | None:
-        if "?" not in self.path:
-            return None
-        query = self.path.split("?", 1)[1]
-        for part in query.split("&"):
-            if not part:
-                continue
-            k, _, v = part.partition("=")
-            if k == key:
-                return v
-        return None
+    def _send_result_pdf(self, state: JobState) -> None:
+        with state.lock:
+            result_path = state.result_path
+        if not state.result or result_path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            source = open(result_path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        # Header values are latin-1 only, so the (non-ASCII) filename goes
+        # through the RFC 5987 filename* form.
+        filename = urllib.parse.quote(state.result["filename"])
+        try:
+            with source:
+                size = os.fstat(source.fileno()).st_size
+                self.send_response(HTTPStatus.OK)
+                self.send_header("Content-Type", "application/pdf")
+                self.send_header(
+                    "Content-Disposition", f"attachment; filename*=UTF-8''{filename}"
+                )
+                self.send_header("Content-Length", str(size))
+                self.end_headers()
+                # Uses os.sendfile where available, so the PDF is copied by the
+                # kernel without passing through Python buffers.
+                self.connection.sendfile(source)
+        except ConnectionError:
+            pass
+        finally:
+            # Released even when the client aborts, so the dir never outlives
+            # the one download attempt.
+            _release_result(state)
+
+    def _disable_send_delay(self) -> None:
+        # Events are small writes; without this Nagle can hold each one back
+        # waiting for the previous ACK.
+        try:
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if hasattr(socket, "TCP_QUICKACK"):
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+        except OSError:
+            pass
 
     def _stream_events(self, state: JobState) -> None:
+        self._disable_send_delay()
+        q = _subscribe(state)
         try:
             while True:
-                event: dict[str, Any] | None = None
-                with state.cv:
-                    if state.events:
-                        event = state.events.pop(0)
-                    elif state.done:
-                        break
-                    else:
-                        state.cv.wait(timeout=1)
-                if event is None:
-                    continue
-                data = json.dumps(event, ensure_ascii=True)
-                self.wfile.write(f"data: {data}\n\n".encode("utf-8"))
+                item = q.get()
+                if item is None:
+                    break
+                event_type, frame = item
+                self.wfile.write(frame)
                 self.wfile.flush()
-                if event.get("type") in ("done", "error"):
+                if event_type in ("done", "error"):
                     break
         except BrokenPipeError:
             return
+        finally:
+            _unsubscribe(state, q)
 
     def log_message(self, format: str, *args: Any) -> None:
         return
@@ -450,17 +702,22 @@ def main(argv: list[str] | None = None) -> int:
     def shutdown_handler(_signum: int, _frame: Any) -> None:
         LOGGER.info("received termination signal, shutting down")
         stop_event.set()
-        httpd.shutdown()
+        # The handler runs on the serve_forever thread; shutdown() waits for
+        # that loop to exit, so it has to be called from another thread.
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
 
     signal.signal(signal.SIGTERM, shutdown_handler)
 
     sys.stdout.write(json.dumps({"type": "ready", "port": port}) + "\n")
     sys.stdout.flush()
     LOGGER.info("engine server started on 127.0.0.1:%s ppid=%s", port, args.ppid)
+    threading.Thread(target=_preload_runner, daemon=True).start()
     try:
         httpd.serve_forever()
     finally:
         stop_event.set()
+        _stop_jobs()
+        SERVICE.release_temp_dirs()
         httpd.server_close()
         LOGGER.info("engine server stopped")
     return 0
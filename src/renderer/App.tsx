@@ -6,7 +6,10 @@ export const App = () => {
   const [isTranslating, setIsTranslating] = useState(false);
   const [progressPct, setProgressPct] = useState(0);
   const [statusText, setStatusText] = useState('');
-  const [result, setResult] = useState<{ filename: string; pdfBase64: string } | null>(null);
+  const [result, setResult] = useState<{
+    filename: string;
+    pdfBytes: Uint8Array<ArrayBuffer>;
+  } | null>(null);
   const [outputFilename, setOutputFilename] = useState('');
   const [service, setService] = useState<'google' | 'bing'>('google');
   const [jobId, setJobId] = useState<string | null>(null);
@@ -56,7 +59,7 @@ export const App = () => {
         if (data.ok && data.result) {
           setResult({
             filename: data.result.filename,
-            pdfBase64: data.result.pdf_base64
+            pdfBytes: data.result.pdf_bytes
           });
           setOutputFilename(data.result.filename);
           setSelectedFilePath(null);
@@ -66,10 +69,10 @@ export const App = () => {
         }
         if (data.ok && window.pdf2zh) {
           window.pdf2zh.getResult(data.jobId).then((result) => {
-            if (result && result.ok && result.pdf_base64 && result.filename) {
+            if (result && result.ok && result.pdf_bytes && result.filename) {
               setResult({
                 filename: result.filename,
-                pdfBase64: result.pdf_base64
+                pdfBytes: result.pdf_bytes
               });
               setOutputFilename(result.filename);
               setSelectedFilePath(null);
@@ -121,8 +124,7 @@ export const App = () => {
 
   const download = async () => {
     if (!result) return;
-    const bytes = Uint8Array.from(atob(result.pdfBase64), (c) => c.charCodeAt(0));
-    const blob = new Blob([bytes], { type: 'application/pdf' });
+    const blob = new Blob([result.pdfBytes], { type: 'application/pdf' });
     const url = URL.createObjectURL(blob);
     const a = document.createElement('a');
     a.href = url;
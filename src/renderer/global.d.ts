@@ -10,9 +10,11 @@ declare global {
         filePath: string;
         service: string;
       }) => Promise<{ jobId: string | null }>;
-      getResult: (
-        jobId: string
-      ) => Promise<{ ok: boolean; filename?: string; pdf_base64?: string } | null>;
+      getResult: (jobId: string) => Promise<{
+        ok: boolean;
+        filename?: string;
+        pdf_bytes?: Uint8Array<ArrayBuffer>;
+      } | null>;
       onProgress: (
         cb: (data: { jobId: string; pct: number; stage: string; message: string }) => void
       ) => void;
@@ -20,7 +22,7 @@ declare global {
         cb: (data: {
           jobId: string;
           ok: boolean;
-          result?: { filename: string; pdf_base64: string };
+          result?: { filename: string; pdf_bytes: Uint8Array<ArrayBuffer> };
         }) => void
       ) => void;
       onError: (